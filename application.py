@@ -1,13 +1,16 @@
+import hashlib
 import os
 import sys
 import time
+from cachetools import TLRUCache
 from jwt import decode, ExpiredSignatureError
 import uvicorn
 from config_memory import ConfigMemory
 from fastapi import Header, HTTPException, Depends, FastAPI, status
 from fastapi.middleware import cors
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from loguru import logger
+from starlette.concurrency import run_in_threadpool
 from template_runner_api import config
 from template_runner_api.lib.v2 import models
 from template_runner_api.lib.v2.service import TemplateRunnerApiService
@@ -16,10 +19,16 @@ import urllib3
 from device_connection import DeviceConnection
 
 # Add the directory right above this one to the python include path
-sys.path.append('/'.join(os.path.dirname(os.path.abspath(__file__)).split('/')[:-1]))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Initialize configuration
 cfg = config.init_cfg()
+# Configuration does not change after startup, build the library dict only once
+cfg_dict = cfg.to_dict()
+
+# JWT settings are fixed for the lifetime of the process, read them once
+_JWT_SECRET = os.environ.get('JWT_SECRET')
+_JWT_AUDIENCE = os.environ.get('JWT_AUDIENCE')
 
 # Create FastAPI app instance
 app = FastAPI(
@@ -29,6 +38,7 @@ app = FastAPI(
     title="Template Runner",
     description="An OpenAPI microservice to run templates across devices in parallel",
     version="2.0",
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS middleware
@@ -40,8 +50,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# JWT validation function
-def validate_jwt(x_auth_token: str = Header(None)):
+# Seconds a validated JWT is trusted before it is decoded again
+_JWT_CACHE_TTL = 30
+
+
+def _jwt_cache_expiry(_key, exp, now):
+    """Expire a cached JWT after the TTL or at its own exp claim, whichever comes first"""
+    if exp is None:
+        return now + _JWT_CACHE_TTL
+    return min(now + _JWT_CACHE_TTL, exp)
+
+
+# Recently validated JWTs, keyed on a blake2b digest of the token and holding its exp
+# claim. Entries use wall clock time so they can be compared against exp.
+_jwt_cache = TLRUCache(maxsize=10000, ttu=_jwt_cache_expiry, timer=time.time)
+
+# Error responses shared by every JWT protected endpoint
+_BASE_RESPONSES = {
+    401: {"description": "Not Authorized"},
+    403: {"description": "Token Expired"},
+}
+
+# JWT validation function, async so the shared cache is only touched from the event loop
+async def validate_jwt(x_auth_token: str = Header(None)):
     """
     Validate a JWT provided in the HTTP headers.
     
@@ -51,12 +82,15 @@ def validate_jwt(x_auth_token: str = Header(None)):
     Raises:
         HTTPException: If the JWT is expired or invalid.
     """
+    token = x_auth_token.encode() if x_auth_token else None
+    key = hashlib.blake2b(token, digest_size=16).digest() if token else None
+    if key is not None and key in _jwt_cache:
+        return
     try:
-        logger.info("START: Validating the JWT")
-        jwt_secret = os.environ['JWT_SECRET']
-        jwt_audience = os.environ['JWT_AUDIENCE']
-        decode(x_auth_token.encode('utf8'), jwt_secret, algorithms=['HS256'], audience=jwt_audience, verify=True)
-        logger.info("END: Validating the JWT")
+        logger.debug("START: Validating the JWT")
+        payload = decode(token, _JWT_SECRET, algorithms=['HS256'], audience=_JWT_AUDIENCE)
+        _jwt_cache[key] = payload.get('exp')
+        logger.debug("END: Validating the JWT")
     except ExpiredSignatureError as ese:
         logger.error(f"ERROR: JWT has expired {ese}")
         raise HTTPException(status_code=403, detail=f'JWT has expired {ese}')
@@ -73,15 +107,15 @@ async def health_check():
     Returns:
         str: Returns "OK" to indicate the API is running.
     """
-    logger.info('MSG: Display if API is running!')
+    logger.debug('MSG: Display if API is running!')
     return "OK"
 
 # Endpoint to render templates
 @app.post("/render-template", response_model=models.RenderTemplateResponse,
-          responses={**{401: {"description": "Not Authorized"}, 403: {"description": "Token Expired"}},
+          responses={**_BASE_RESPONSES,
                      500: {"description": "Internal Server Error", "model": models.RenderTemplateResponse}},
           dependencies=[Depends(validate_jwt)])
-def render_template(api_request: models.RenderTemplateRequest, x_auth_token: str = Header(None)):
+async def render_template(api_request: models.RenderTemplateRequest, x_auth_token: str = Header(None)):
     """
     Render templates based on the provided request.
 
@@ -94,21 +128,23 @@ def render_template(api_request: models.RenderTemplateRequest, x_auth_token: str
     """
     try:
         logger.info('START: Render templates')
-        service = TemplateRunnerApiService(config=cfg.to_dict())
-        _err, api_result = service.render_templates(config=cfg.to_dict(), api_request=api_request)
+        service = ConfigMemory.get("APP_SERVICE")
+        # the service layer is blocking, keep it off the event loop
+        _err, api_result = await run_in_threadpool(service.render_templates, config=cfg_dict,
+                                                   api_request=api_request)
         logger.info('END: Render templates')
         return api_result
     except Exception as e:
         error_msg = f"An unexpected exception occurred: {e}"
         logger.error(error_msg)
-        return JSONResponse(content={"error": error_msg}, status_code=500)
+        return ORJSONResponse(content={"error": error_msg}, status_code=500)
 
 # Endpoint to run templates
 @app.post("/run-template", response_model=models.TemplateRunnerApiResponse,
-          responses={**{401: {"description": "Not Authorized"}, 403: {"description": "Token Expired"}},
+          responses={**_BASE_RESPONSES,
                      500: {"description": "Internal Server Error", "model": models.TemplateRunnerApiResponse}},
           dependencies=[Depends(validate_jwt)])
-def run_template(api_request: models.TemplateRunnerApiRequest, x_auth_token: str = Header(None)):
+async def run_template(api_request: models.TemplateRunnerApiRequest, x_auth_token: str = Header(None)):
     """
     Run a template based on the provided request.
 
@@ -125,17 +161,19 @@ def run_template(api_request: models.TemplateRunnerApiRequest, x_auth_token: str
         else:
             if not api_request.device_username:
                 api_request.jwt = x_auth_token
-        service = TemplateRunnerApiService(config=cfg.to_dict())
-        _err, result = service.run_templates(api_request=api_request)
+        service = ConfigMemory.get("APP_SERVICE")
+        _err, result = await run_in_threadpool(service.run_templates, api_request=api_request)
         if _err:
-            return JSONResponse(content={"error": str(_err)}, status_code=500)
+            return ORJSONResponse(content={"error": str(_err)}, status_code=500)
 
-        real_result = models.TemplateRunnerApiResponse(**result.dict())
-        return real_result
+        if isinstance(result, models.TemplateRunnerApiResponse):
+            return result
+        # response_model validates on the way out, no need to validate twice
+        return models.TemplateRunnerApiResponse.construct(**result.dict())
     except Exception as e:
         error_msg = f"An unexpected exception occurred: {e}"
         logger.error(error_msg)
-        return JSONResponse(content={"error": error_msg}, status_code=500)
+        return ORJSONResponse(content={"error": error_msg}, status_code=500)
 
 # Startup event
 @app.on_event("startup")
@@ -143,11 +181,13 @@ async def startup():
     """
     Initialize the service and configuration at startup.
     """
-    cfg = config.init_cfg()
-    service = TemplateRunnerApiService(config=cfg.to_dict())
-    my_dict = cfg.to_dict()
-    my_dict['redis_password'] = "REDACTED"  # nosec
-    logger.debug(my_dict)
+    if not _JWT_SECRET or not _JWT_AUDIENCE:
+        raise RuntimeError("JWT_SECRET and JWT_AUDIENCE must be set in the environment")
+    service = TemplateRunnerApiService(config=cfg_dict)
+    if os.getenv("LOGURU_LEVEL", "INFO") == "DEBUG":
+        my_dict = dict(cfg_dict)
+        my_dict['redis_password'] = "REDACTED"  # nosec
+        logger.debug(my_dict)
     ConfigMemory.set("APP_SERVICE", service)
 
 # Main entry point for the application
@@ -173,11 +213,12 @@ if __name__ == "__main__":
             host="0.0.0.0",
             port=app_port,
             log_level=log_level,
+            loop="uvloop",
+            http="httptools",
             root_path=cfg.root_path
         )
     )
 
     setup_logging()
     logger.debug("Starting the Uvicorn server...")
-    logger.info({"password": "secret"})  # This should be removed or replaced with a safer practice
     uv_server.run()
@@ -6,6 +6,9 @@ from template_runner_api.lib.v2 import service
 
 ROOT_APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
+# ApiConfig built by the first init_cfg() call
+_CFG_SINGLETON = None
+
 @environ.config(prefix='')
 class ApiConfig:
     postgraphile_url = environ.var()
@@ -42,6 +45,9 @@ class ApiConfig:
 
 
 def init_cfg():
+    global _CFG_SINGLETON
+    if _CFG_SINGLETON is not None:
+        return _CFG_SINGLETON
     ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
     if 'RUNLOCAL' in os.environ and os.environ['RUNLOCAL'] == "1":
         # Read the local config and stuff all the values in os.environ
@@ -50,7 +56,8 @@ def init_cfg():
             for item in c['env']:
                 for key in item:
                     os.environ[key] = str(item[key])
-    return environ.to_config(ApiConfig)
+    _CFG_SINGLETON = environ.to_config(ApiConfig)
+    return _CFG_SINGLETON
 
 def init_api():
     cfg = init_cfg()
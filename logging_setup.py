@@ -1,14 +1,17 @@
+import inspect
 import os
 import re
 import sys
 from loguru import logger
-import logginggit
-import json
+import logging
 
 
 class LoggingFormatter:
     """The base logging formatter for DCS"""
 
+    # literals that must be present for any of the scrub patterns to match
+    scrub_tokens = ("://", "password", "secret", "jwt", "st2_api_key")
+
     def __init__(self, fmt):
         super().__init__()
         # regex pattern scrubber. Could not turn message into JSON if it existed, went with regex - Josh
@@ -20,6 +23,8 @@ class LoggingFormatter:
             r".st2_api_key.:\W+['|\"](.*?)['|\"]": r"'st2_api_key': '[REDACTED]'",
             r".redis_password.:\W+['|\"](.*?)['|\"]": r"'redis_password': '[REDACTED]'",
         }
+        # applied one after another, later patterns rely on re-scanning the text rewritten by earlier ones
+        self._scrub = [(re.compile(search), replace) for search, replace in self.scrub_patterns.items()]
         self.fmt = fmt
 
     def format(self, record):
@@ -27,10 +32,9 @@ class LoggingFormatter:
 
         scrubbed = record["message"]
         # scrubs any messages that match the message pattern
-        if isinstance(scrubbed, dict):
-            scrubbed = json.dumps(scrubbed)
-        for search, replace in self.scrub_patterns.items():
-            scrubbed = re.sub(search, replace, scrubbed)
+        if any(token in scrubbed for token in self.scrub_tokens):
+            for pattern, replace in self._scrub:
+                scrubbed = pattern.sub(replace, scrubbed)
         record["extra"]["scrubbed"] = scrubbed
 
         if not record["extra"].get("device") or record["extra"].get("device") is None:
@@ -49,8 +53,8 @@ class InterceptHandler(logging.Handler):
             level = record.levelno
 
         # Find caller from where originated the logged message
-        frame, depth = logging.currentframe(), 2
-        while frame.f_code.co_filename == logging.__file__:
+        frame, depth = inspect.currentframe(), 0
+        while frame and (depth == 0 or frame.f_code.co_filename == logging.__file__):
             frame = frame.f_back
             depth += 1
         logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
@@ -69,7 +73,7 @@ def setup_logging():
     # add the loggers after hand
     if log_level == "DEBUG":
         logger.add(
-            sink=sys.stderr,
+            sink=sys.stdout,
             level="DEBUG",
             format=std_formatter.format,
             enqueue=True,
@@ -79,23 +83,20 @@ def setup_logging():
         )
     else:
         logger.add(
-            sink=sys.stderr,
+            sink=sys.stdout,
             level=log_level,
             format=std_formatter.format,
             enqueue=True,
             backtrace=False,
-            diagnose=True,
+            diagnose=False,
             colorize=True,
         )
 
     # intercept root logger
     logging.root.handlers = [InterceptHandler()]
     logging.root.setLevel(log_level)
-    for name in logging.root.manager.loggerDict.keys():
-        logging.getLogger(name).handlers = []
-        logging.getLogger(name).propagate = True
-
-    logger.configure(handlers=[{"sink": sys.stdout, "serialize": False}])
-
-
-
+    for existing in logging.root.manager.loggerDict.values():
+        # skip PlaceHolder entries, they have no handlers of their own
+        if isinstance(existing, logging.Logger):
+            existing.handlers.clear()
+            existing.propagate = True